@@ -1,3 +1,5 @@
+import numpy as np
+
 from polyengine.metricutils import *
 from polyengine.diffequations import *
 import time
@@ -14,45 +16,42 @@ LENGTH = 3
 HEIGHT = 3
 TIME = 1
 TOTAL_CELLS = int(LENGTH/DX) * int(HEIGHT/DX)
+N_STEPS = int(TIME/DT)
 UPDATE_FREQUENCY = 100
-PARALLEL_PROCESS = True
-PROCESSES = 36
+GIVE_UPDATES = True
 
-ranges = []
-for j in range(PROCESSES):
-    cells_wide = int(LENGTH/DX)
-    r = range(int(j*cells_wide/PROCESSES), int((j+1)*cells_wide/PROCESSES))
-    ranges.append(r)
+PARAMETERS_DESCRIPTION = f"dx={DX}m, region={LENGTH*HEIGHT}m^2, cells={TOTAL_CELLS}, steps={N_STEPS}, dt={DT}s, total-simulation-time={TIME}s"
 
 DEBUG_X = int(1/DX)
 DEBUG_Y = int(1.5/DX)
 
 def run():
-    print(f"Simulation parameters: dx={DX}m, region={LENGTH*HEIGHT}m^2, cells={TOTAL_CELLS}, steps={int(TIME/DT)}, dt={DT}s, total-simulation-time={TIME}s")
+    print(f"Simulation parameters: {PARAMETERS_DESCRIPTION}")
     print("Setting initial conditions...")
 
     air = Material('air', 0, 0, 0, 0)
     steel = Material('steel', 8000, 250, 140000, 75000)
+    materials = [air, steel]
 
-    material_distribution = Grid(int(LENGTH/DX), int(HEIGHT/DX), DataCell, air)
-    for column in material_distribution.cells:
-        for cell in column:
-            if int(1/DX) <= cell.y <= int(2/DX):
-                cell.data = steel
+    cells_wide = int(LENGTH/DX)
+    cells_high = int(HEIGHT/DX)
+    steel_band = slice(int(1/DX), int(2/DX)+1)
 
+    material_ids = np.zeros((cells_high, cells_wide), dtype=np.intp)
+    material_ids[steel_band, :] = 1
+    density = np.array([m.density for m in materials])[material_ids]
 
-    external_forces = Grid(int(LENGTH/DX), int(HEIGHT/DX), DataCell, Vector2(0, 0))
-    for column in external_forces.cells:
-        for cell in column:
-            cell.data = material_distribution.get_cell(cell.x, cell.y).data.density * GRAVITY
+    external_forces = FieldGrid(cells_wide, cells_high, nfields=2)
+    external_forces[0] = density * GRAVITY.x
+    external_forces[1] = density * GRAVITY.y
 
-    for column in external_forces.cells:
-        for cell in column:
-            if int(1/DX) <= cell.y <= int(2/DX) and (cell.x <= int(1/DX) or cell.x >= int(2/DX)):
-                cell.data -= material_distribution.get_cell(cell.x, cell.y).data.density * GRAVITY
+    for supported in (slice(None, int(1/DX)+1), slice(int(2/DX), None)):
+        external_forces[0][steel_band, supported] -= density[steel_band, supported] * GRAVITY.x
+        external_forces[1][steel_band, supported] -= density[steel_band, supported] * GRAVITY.y
 
     equation = LinearElasticityPDE(
-        material_distribution,
+        material_ids,
+        materials,
         external_forces,
         LENGTH,
         HEIGHT,
@@ -62,46 +61,44 @@ def run():
     )
 
     print(f"Initial conditions set in {round(time.time() - start_time, 3)} seconds, starting simulation...")
-    step_times = [0]*int(TIME/DT)
-    for i in range(int(TIME/DT)):
-        step_start_time = time.time()
-        print(f'Step {i+1}/{int(TIME/DT)}(simulation-time={round((i+1)*DT, 3)}s):')
-        print('Computing displacements...')
-        computation_start_time = time.time()
-        equation.update_u()
-        print(f'All {TOTAL_CELLS} displacements computed for step {i+1}/{int(TIME/DT)} in {round(time.time() - computation_start_time, 3)} seconds. Computing velocities...')
-        computation_start_time = time.time()
-        if PARALLEL_PROCESS:
-            with Pool(PROCESSES) as p:
-                p.map(equation.update_u_dot, ranges)
-        else:
+    step_times = [0]*N_STEPS
+    if GIVE_UPDATES:
+        for i in range(N_STEPS):
+            step_start_time = time.time()
+            print(f'Step {i+1}/{N_STEPS}(simulation-time={round((i+1)*DT, 3)}s):')
+            print('Computing displacements...')
+            computation_start_time = time.time()
+            equation.update_u()
+            print(f'All {TOTAL_CELLS} displacements computed for step {i+1}/{N_STEPS} in {round(time.time() - computation_start_time, 3)} seconds. Computing velocities...')
+            computation_start_time = time.time()
             equation.update_u_dot()
-        print(f'All {TOTAL_CELLS} velocities computed for step {i + 1}/{int(TIME / DT)} in {round(time.time() - computation_start_time, 3)} seconds. Computing strains...')
-        computation_start_time = time.time()
-        if PARALLEL_PROCESS:
-            with Pool(PROCESSES) as q:
-                q.map(equation.update_strain, ranges)
-        else:
+            print(f'All {TOTAL_CELLS} velocities computed for step {i + 1}/{N_STEPS} in {round(time.time() - computation_start_time, 3)} seconds. Computing strains...')
+            computation_start_time = time.time()
             equation.update_strain()
-        print(f'All {TOTAL_CELLS} strains computed for step {i+1}/{int(TIME/DT)} in {round(time.time() - computation_start_time, 3)} seconds. Computing stresses...')
-        computation_start_time = time.time()
-        equation.update_stress()
-        step_time = round(time.time() - step_start_time, 3)
-        step_times[i] = step_time
-        print(f'All {TOTAL_CELLS} stresses computed for step {i+1}/{int(TIME/DT)} in {round(time.time() - computation_start_time, 3)} seconds. Finished simulating step in {step_time} seconds! ({round(time.time() - start_time, 3)} seconds total)')
-        equation.current_time += equation.dt
-
-    average_step_time = 0
-    for t in step_times:
-        average_step_time += t/int(TIME/DT)
-
-    print(f"Finished simulating(dx={DX}m, region={LENGTH*HEIGHT}m^2, cells={TOTAL_CELLS}, steps={int(TIME/DT)}, dt={DT}s, total-simulation-time={TIME}s) in {round(time.time() - start_time, 3)} seconds! Average step time was {round(average_step_time, 3)} seconds.")
-    print(f"Stress at {DEBUG_X*DX}m, {DEBUG_Y*DX}m: {equation.stresses.get_cell(DEBUG_X, DEBUG_Y).data}")
-    print(f"Strain at {DEBUG_X*DX}m, {DEBUG_Y*DX}m: {equation.strains.get_cell(DEBUG_X, DEBUG_Y).data}")
-    print(f"Stress divergence at {DEBUG_X*DX}m, {DEBUG_Y*DX}m: {tensor_divergence(equation.stresses, DX, DEBUG_X, DEBUG_Y)}")
-    print(f"Forces near {DEBUG_X*DX}m, {DEBUG_Y*DX}m: {equation.external_force_field.get_neighbors(DEBUG_X, DEBUG_Y)}")
-    print(f"Displacements near {DEBUG_X*DX}m, {DEBUG_Y*DX}m: {equation.displacements.get_neighbors(DEBUG_X, DEBUG_Y)}")
-    print(f"Vector gradient at {DEBUG_X*DX}m, {DEBUG_Y*DX}m: {vector_gradient(equation.displacements, DX, DEBUG_X, DEBUG_Y)}")
+            print(f'All {TOTAL_CELLS} strains computed for step {i+1}/{N_STEPS} in {round(time.time() - computation_start_time, 3)} seconds. Computing stresses...')
+            computation_start_time = time.time()
+            equation.update_stress()
+            step_time = round(time.time() - step_start_time, 3)
+            step_times[i] = step_time
+            print(f'All {TOTAL_CELLS} stresses computed for step {i+1}/{N_STEPS} in {round(time.time() - computation_start_time, 3)} seconds. Finished simulating step in {step_time} seconds! ({round(time.time() - start_time, 3)} seconds total)')
+            equation.current_time += equation.dt
+    else:
+        for i in range(N_STEPS):
+            step_start_time = time.time()
+            equation.step()
+            step_times[i] = round(time.time() - step_start_time, 3)
+
+    average_step_time = sum(step_times)/len(step_times)
+
+    print(f"Finished simulating({PARAMETERS_DESCRIPTION}) in {round(time.time() - start_time, 3)} seconds! Average step time was {round(average_step_time, 3)} seconds.")
+    print(f"Stress at {DEBUG_X*DX}m, {DEBUG_Y*DX}m: {as_tensor(equation.get_stress(DEBUG_X, DEBUG_Y))}")
+    print(f"Strain at {DEBUG_X*DX}m, {DEBUG_Y*DX}m: {as_tensor(equation.get_strain(DEBUG_X, DEBUG_Y))}")
+    stress_div_x, stress_div_y = tensor_divergence(equation.stresses[0], equation.stresses[1], equation.stresses[2], DX)
+    print(f"Stress divergence at {DEBUG_X*DX}m, {DEBUG_Y*DX}m: {Vector2(stress_div_x[DEBUG_Y, DEBUG_X], stress_div_y[DEBUG_Y, DEBUG_X])}")
+    print(f"Forces near {DEBUG_X*DX}m, {DEBUG_Y*DX}m: {equation.external_force_field.neighborhood(1, DEBUG_X, DEBUG_Y)}")
+    print(f"Displacements near {DEBUG_X*DX}m, {DEBUG_Y*DX}m: {equation.displacements.neighborhood(1, DEBUG_X, DEBUG_Y)}")
+    pxx, pxy, pyx, pyy = vector_gradient(equation.displacements[0], equation.displacements[1], DX)
+    print(f"Vector gradient at {DEBUG_X*DX}m, {DEBUG_Y*DX}m: {Tensor(pxx[DEBUG_Y, DEBUG_X], pxy[DEBUG_Y, DEBUG_X], pyx[DEBUG_Y, DEBUG_X], pyy[DEBUG_Y, DEBUG_X])}")
     print(f"Material at {DEBUG_X*DX}m, {DEBUG_Y*DX}m: {equation.get_material(DEBUG_X, DEBUG_Y).material_name}")
 
 if __name__ == '__main__':
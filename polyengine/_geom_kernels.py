@@ -0,0 +1,100 @@
+import math
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+__doc__ = """
+Compiled scalar kernels for the geometric predicates in metricutils.
+"""
+
+# Integer codes for the inequality operators, so the containment kernels stay branch-cheap
+INEQUALITY_CODES = {'==': 0, '>': 1, '>=': 2, '<=': 3, '<': 4}
+
+
+def _angle_rad(x1: float, y1: float, x2: float, y2: float, cx: float, cy: float) -> float:
+    """ Angle kernel on raw coordinates, via atan2 — no sqrt, and stable for near-collinear points """
+    dx1, dy1 = x1-cx, y1-cy
+    dx2, dy2 = x2-cx, y2-cy
+    cross = dx1*dy2 - dy1*dx2
+    dot_prod = dx1*dx2 + dy1*dy2
+    return math.atan2(abs(cross), dot_prod)
+
+
+def _apply_op(op: int, value: float) -> bool:
+    """ Tests a value against 0 with the inequality encoded by op """
+    if op == 0:
+        return value == 0
+    if op == 1:
+        return value > 0
+    if op == 2:
+        return value >= 0
+    if op == 3:
+        return value <= 0
+    return value < 0
+
+
+def _region_contains(c1: float, c2: float, c3: float, op: int, px: float, py: float) -> bool:
+    """ Tests c1*px + c2*py + c3 against 0 with the inequality encoded by op """
+    return _apply_op(op, c1*px + c2*py + c3)
+
+
+def _segment_contains(c1: float, c2: float, c3: float,
+                      xmin: float, xmax: float, ymin: float, ymax: float,
+                      px: float, py: float) -> bool:
+    """ Tests that a point lies on the segment's line and inside its bounding box """
+    # Cheap bounding-box rejection first; the line test only runs for nearby points
+    if not (xmin <= px <= xmax and ymin <= py <= ymax):
+        return False
+    return c1*px + c2*py + c3 == 0
+
+
+def _region_mask(c1: float, c2: float, c3: float, op: int,
+                 xs: np.ndarray, ys: np.ndarray, out: np.ndarray):
+    """ Batch region containment over coordinate arrays, written into a preallocated boolean array """
+    for k in range(xs.shape[0]):
+        out[k] = _apply_op(op, c1*xs[k] + c2*ys[k] + c3)
+
+
+def _segment_contains_batch(c1: float, c2: float, c3: float,
+                            xmin: float, xmax: float, ymin: float, ymax: float,
+                            xs: np.ndarray, ys: np.ndarray, out: np.ndarray):
+    """ Batch segment containment over coordinate arrays, written into a preallocated boolean array """
+    for k in range(xs.shape[0]):
+        out[k] = (c1*xs[k] + c2*ys[k] + c3 == 0
+                  and xmin <= xs[k] <= xmax
+                  and ymin <= ys[k] <= ymax)
+
+
+if numba is not None:
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def pairwise_distances(xs: np.ndarray, ys: np.ndarray, out: np.ndarray):
+        """ All-pairs distances between points, written into a preallocated (n, n) array """
+        n = xs.shape[0]
+        for i in numba.prange(n):
+            xi = xs[i]
+            yi = ys[i]
+            for j in range(n):
+                dx = xs[j] - xi
+                dy = ys[j] - yi
+                out[i, j] = math.sqrt(dx*dx + dy*dy)
+
+    _angle_rad = numba.njit(cache=True)(_angle_rad)
+    _apply_op = numba.njit(cache=True)(_apply_op)
+    _region_contains = numba.njit(cache=True)(_region_contains)
+    _segment_contains = numba.njit(cache=True)(_segment_contains)
+    _segment_contains_batch = numba.njit(cache=True)(_segment_contains_batch)
+
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _region_mask(c1: float, c2: float, c3: float, op: int,
+                     xs: np.ndarray, ys: np.ndarray, out: np.ndarray):
+        """ Batch region containment over coordinate arrays, parallelized across points """
+        for k in numba.prange(xs.shape[0]):
+            out[k] = _apply_op(op, c1*xs[k] + c2*ys[k] + c3)
+else:
+    def pairwise_distances(xs: np.ndarray, ys: np.ndarray, out: np.ndarray):
+        """ All-pairs distances via NumPy broadcasting when numba is unavailable """
+        np.hypot(xs[:, None] - xs[None, :], ys[:, None] - ys[None, :], out=out)
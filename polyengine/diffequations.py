@@ -1,11 +1,26 @@
 import math
-from multiprocessing import Pool
+from typing import Sequence
+
+import numpy as np
+
 from .metricutils import *
 from .gridutils import *
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    import cupy
+except ImportError:
+    cupy = None
+
 GRAVITY = Vector2(0, -9.8)
 
 class Material:
+    __slots__ = ('material_name', 'density', 'yield_strength', 'bulk_modulus', 'shear_modulus')
+
     def __init__(self, material_name: str, density: float, yield_strength: float, bulk_modulus: float, shear_modulus: float):
         """
         A physical material.
@@ -57,21 +72,25 @@ class Tensor:
             return Tensor(self.xx * other, self.xy * other, self.yx * other, self.yy * other)
         if isinstance(other, Tensor):
             return Tensor(
-                Vector2(self.xx, self.xy) * Vector2(other.xx, other.yx),
-                Vector2(self.xx, self.xy) * Vector2(other.xy, other.yy),
-                Vector2(self.yx, self.yy) * Vector2(other.xx, other.yx),
-                Vector2(self.yx, self.yy) * Vector2(other.xy, other.yy)
+                self.xx*other.xx + self.xy*other.yx,
+                self.xx*other.xy + self.xy*other.yy,
+                self.yx*other.xx + self.yy*other.yx,
+                self.yx*other.xy + self.yy*other.yy
             )
         if isinstance(other, Vector2):
             return Vector2(
-                self.xx * other.x + self.xy + other.y,
-                self.yx * other.x + self.yy + other.y
+                self.xx * other.x + self.xy * other.y,
+                self.yx * other.x + self.yy * other.y
             )
 
     def __rmul__(self, other):
         if isinstance(other, float) or isinstance(other, int):
             return self * other
 
+    def as_matrix(self) -> np.ndarray:
+        """ The tensor as a 2x2 array, for handing tensor math to NumPy; as_tensor converts back """
+        return np.array([[self.xx, self.xy], [self.yx, self.yy]])
+
     @property
     def transpose(self):
         return Tensor(self.xx, self.yx, self.xy, self.yy)
@@ -95,17 +114,39 @@ class Tensor:
 
 class StressTensor(Tensor):
     def __init__(self, xx: float, xy: float, yy: float):
-        super().__init__(xx, xy, xy, yy)
+        """
+        A symmetric tensor, stored as its three distinct components.
+        :param xx:
+        :param xy:
+        :param yy:
+        """
+        self.xx = xx
+        self.xy = xy
+        self.yy = yy
+
+    @property
+    def yx(self):
+        return self.xy
+
+    def __repr__(self):
+        return f'StressTensor[[{self.xx}, {self.xy}], [{self.xy}, {self.yy}]]'
 
     def __add__(self, other):
         return StressTensor(self.xx + other.xx, self.xy + other.xy, self.yy + other.yy)
 
+    def __sub__(self, other):
+        return StressTensor(self.xx - other.xx, self.xy - other.xy, self.yy - other.yy)
+
     def __mul__(self, other):
         if isinstance(other, float) or isinstance(other, int):
             return StressTensor(self.xx * other, self.xy * other, self.yy * other)
         else:
             return super().__mul__(other)
 
+    @property
+    def transpose(self):
+        return self
+
     @staticmethod
     def from_matrix(m: Tensor):
         """
@@ -130,163 +171,338 @@ class StressTensor(Tensor):
         return self - (1/3)*self.invariants[0]*self.identity
 
 
-def partial_derivative(grid: Grid[DataCell[float]], dx: float, x_index: float, y_index: float, direction: str):
-    neighborhood = grid.get_neighbors(x_index, y_index)
-    match direction:
-        case 'x':
-            if x_index == 0:
-                return (neighborhood.get_cell(2, 1).data - neighborhood.get_cell(1, 1).data)/dx
-            if x_index == grid.column_end:
-                return (neighborhood.get_cell(1, 1).data - neighborhood.get_cell(0, 1).data) / dx
-            return (neighborhood.get_cell(2, 1).data - neighborhood.get_cell(0, 1).data)/dx
-        case 'y':
-            if y_index == 0:
-                return (neighborhood.get_cell(1, 2).data - neighborhood.get_cell(1, 1).data)/dx
-            if y_index == grid.row_end:
-                return (neighborhood.get_cell(1, 1).data - neighborhood.get_cell(1, 0).data)/dx
-            return (neighborhood.get_cell(1, 2).data - neighborhood.get_cell(1, 0).data)/dx
-        case _:
-            raise ValueError("Invalid direction")
-
-
-def vector_gradient(grid: Grid[DataCell[Vector2]], dx: float, x_index: float, y_index: float) -> Tensor:
-    gx = Grid(grid.column_end + 1, grid.row_end + 1, DataCell, Vector2(0, 0))
-    gy = Grid(grid.column_end + 1, grid.row_end + 1, DataCell, Vector2(0, 0))
-    for column in gx.cells:
-        for cell in column:
-            cell.data = grid.get_cell(cell.x, cell.y).data.x
-    for column in gy.cells:
-        for cell in column:
-            cell.data = grid.get_cell(cell.x, cell.y).data.y
-    pxx = partial_derivative(gx, dx, x_index, y_index, 'x')
-    pxy = partial_derivative(gx, dx, x_index, y_index, 'y')
-    pyx = partial_derivative(gy, dx, x_index, y_index, 'x')
-    pyy = partial_derivative(gy, dx, x_index, y_index, 'y')
-    return Tensor(pxx, pxy, pyx, pyy)
-
-
-def vector_divergence(grid: Grid[DataCell[Vector2]], dx: float, x_index: float, y_index: float):
-    return vector_gradient(grid, dx, x_index, y_index).trace
-
-
-def tensor_divergence(grid: Grid[DataCell[Tensor]], dx: float, x_index: float, y_index: float) -> Vector2:
-    gx = Grid(grid.column_end+1, grid.row_end+1, DataCell, Vector2(0, 0))
-    gy = Grid(grid.column_end+1, grid.row_end+1, DataCell, Vector2(0, 0))
-    for column in gx.cells:
-        for cell in column:
-            gxx = grid.get_cell(cell.x, cell.y).data.xx
-            gxy = grid.get_cell(cell.x, cell.y).data.yx
-            cell.data = Vector2(gxx, gxy)
-    for column in gy.cells:
-        for cell in column:
-            gyx = grid.get_cell(cell.x, cell.y).data.xy
-            gyy = grid.get_cell(cell.x, cell.y).data.yy
-            cell.data = Vector2(gyx, gyy)
-    div_x = vector_divergence(gx, dx, x_index, y_index)
-    div_y = vector_divergence(gy, dx, x_index, y_index)
-    return Vector2(div_x, div_y)
+def as_vector(arr) -> Vector2:
+    """ Wraps a length-2 array in a Vector2, for debug printing """
+    return Vector2(arr[0], arr[1])
+
+
+def as_tensor(arr) -> Tensor:
+    """ Wraps a 2x2 array in a Tensor, for debug printing """
+    return Tensor(arr[0, 0], arr[0, 1], arr[1, 0], arr[1, 1])
+
+
+def grad_x(field: np.ndarray, dx: float) -> np.ndarray:
+    """ Computes the partial derivative of a whole field along x, with edge-replicated padding for a uniform central difference """
+    f_padded = np.pad(field, 1, mode='edge')
+    return (f_padded[1:-1, 2:] - f_padded[1:-1, :-2])*(0.5/dx)
+
+
+def grad_y(field: np.ndarray, dx: float) -> np.ndarray:
+    """ Computes the partial derivative of a whole field along y, with edge-replicated padding for a uniform central difference """
+    f_padded = np.pad(field, 1, mode='edge')
+    return (f_padded[2:, 1:-1] - f_padded[:-2, 1:-1])*(0.5/dx)
+
+
+def vector_gradient(field_x: np.ndarray, field_y: np.ndarray, dx: float) -> tuple:
+    """ Returns the four components (pxx, pxy, pyx, pyy) of the gradient of a vector field, as whole arrays """
+    return grad_x(field_x, dx), grad_y(field_x, dx), grad_x(field_y, dx), grad_y(field_y, dx)
+
+
+def vector_divergence(field_x: np.ndarray, field_y: np.ndarray, dx: float) -> np.ndarray:
+    return grad_x(field_x, dx) + grad_y(field_y, dx)
+
+
+def tensor_divergence(t_xx: np.ndarray, t_xy: np.ndarray, t_yy: np.ndarray, dx: float) -> tuple:
+    """ Returns the (div_x, div_y) components of the divergence of a symmetric tensor field, as whole arrays """
+    div_x = vector_divergence(t_xx, t_xy, dx)
+    div_y = vector_divergence(t_xy, t_yy, dx)
+    return div_x, div_y
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _ddx(field, half_inv_dx, i, j):
+        # Central difference with replicated edges, matching grad_x
+        left = field[j, i-1] if i > 0 else field[j, 0]
+        right = field[j, i+1] if i < field.shape[1]-1 else field[j, i]
+        return (right - left)*half_inv_dx
+
+    @numba.njit(cache=True)
+    def _ddy(field, half_inv_dx, i, j):
+        # Central difference with replicated edges, matching grad_y
+        below = field[j-1, i] if j > 0 else field[0, i]
+        above = field[j+1, i] if j < field.shape[0]-1 else field[j, i]
+        return (above - below)*half_inv_dx
+
+    _step_kernel_cache = {}
+
+    def make_step_kernel(columns, rows, dx, dt, dtype=np.float64):
+        """
+        Returns the fused step kernel specialized for a fixed grid shape, cell
+        size and time step. The pre-cast dt and 1/dx constants are captured in
+        the closure, so Numba bakes them into the compiled code as literals;
+        compiled kernels are cached per (columns, rows, dx, dt, dtype) and
+        reused across equations.
+        """
+        dtype = np.dtype(dtype)
+        key = (columns, rows, dx, dt, dtype.name)
+        if key in _step_kernel_cache:
+            return _step_kernel_cache[key]
+        step_dt = dtype.type(dt)
+        inv_dx = dtype.type(1/dx)
+        half_inv_dx = dtype.type(0.5/dx)
+
+        @numba.njit(parallel=True, fastmath=True)
+        def step_kernel(disp_x, disp_y, vel_x, vel_y,
+                        strain_xx, strain_xy, strain_yy,
+                        stress_xx, stress_xy, stress_yy,
+                        force_x, force_y, inv_density,
+                        lame_coefficient_1, lame_coefficient_2,
+                        active_idx, inactive_idx,
+                        gravity_x, gravity_y, current_time):
+            """ One fused time step over all fields: displacements, velocities, strains, stresses """
+            for k in numba.prange(inactive_idx.shape[0]):
+                j = inactive_idx[k, 0]
+                i = inactive_idx[k, 1]
+                disp_x[j, i] = 0.5 * current_time**2 * gravity_x
+                disp_y[j, i] = 0.5 * current_time**2 * gravity_y
+                vel_x[j, i] = current_time * gravity_x
+                vel_y[j, i] = current_time * gravity_y
+            for k in numba.prange(active_idx.shape[0]):
+                j = active_idx[k, 0]
+                i = active_idx[k, 1]
+                disp_x[j, i] += vel_x[j, i] * step_dt
+                disp_y[j, i] += vel_y[j, i] * step_dt
+                div_x = _ddx(stress_xx, half_inv_dx, i, j) + _ddy(stress_xy, half_inv_dx, i, j)
+                div_y = _ddx(stress_xy, half_inv_dx, i, j) + _ddy(stress_yy, half_inv_dx, i, j)
+                vel_x[j, i] += (div_x + force_x[j, i]) * inv_density[j, i] * step_dt
+                vel_y[j, i] += (div_y + force_y[j, i]) * inv_density[j, i] * step_dt
+            for k in numba.prange(active_idx.shape[0]):
+                j = active_idx[k, 0]
+                i = active_idx[k, 1]
+                pxx = _ddx(disp_x, half_inv_dx, i, j)
+                pxy = _ddy(disp_x, half_inv_dx, i, j)
+                pyx = _ddx(disp_y, half_inv_dx, i, j)
+                pyy = _ddy(disp_y, half_inv_dx, i, j)
+                shear_strain = 0.5*(pxy + pyx)
+                strain_xx[j, i] = pxx
+                strain_xy[j, i] = shear_strain
+                strain_yy[j, i] = pyy
+                lame_1 = lame_coefficient_1[j, i]
+                lame_2 = lame_coefficient_2[j, i]
+                strain_trace = pxx + pyy
+                stress_xx[j, i] = 2*lame_1*pxx + lame_2*strain_trace
+                stress_xy[j, i] = 2*lame_1*shear_strain
+                stress_yy[j, i] = 2*lame_1*pyy + lame_2*strain_trace
+
+        _step_kernel_cache[key] = step_kernel
+        return step_kernel
 
 
 class LinearElasticityPDE:
     def __init__(
             self,
-            material_dist: Grid[DataCell[Material]],
-            external_force_field: Grid[DataCell[Vector2]],
+            material_ids: np.ndarray,
+            materials: Sequence[Material],
+            external_force_field: FieldGrid,
             total_length: float,
             total_height: float,
             total_time: float,
             dx: float = 0.01,
-            dt: float = 0.01
+            dt: float = 0.01,
+            dtype=np.float32,
+            backend: str = 'cpu'
     ):
-        self.material_dist = material_dist
+        """
+        Linear elasticity over a rectangular grid, stored structure-of-arrays.
+        Vector fields hold their x and y components as fields 0 and 1; the
+        stress and strain fields are symmetric and hold xx, xy, yy as fields
+        0 to 2. The stencil is memory
+        bound, so fields default to float32; pass dtype=np.float64 for double
+        precision.
+        With backend='gpu' all fields live on the GPU as CuPy arrays and the
+        vectorized update passes run there; state only moves to the host when
+        read through the per-point accessors.
+        :param material_ids: (rows, columns) array of indices into materials
+        :param materials:
+        :param external_force_field:
+        :param backend: 'cpu' or 'gpu'
+        """
+        if backend not in {'cpu', 'gpu'}:
+            raise ValueError("Invalid backend. Options are 'cpu' or 'gpu'")
+        if backend == 'gpu' and cupy is None:
+            raise ImportError('CuPy is required for the GPU backend')
+        self.backend = backend
+        self.dtype = np.dtype(dtype)
+        self.columns = int(total_length / dx)
+        self.rows = int(total_height / dx)
+        self.material_ids = material_ids
+        self.materials = list(materials)
+        self.material_density = np.array([m.density for m in self.materials], dtype=np.float64)
+        self.material_shear = np.array([m.shear_modulus for m in self.materials], dtype=np.float64)
+        self.material_bulk = np.array([m.bulk_modulus for m in self.materials], dtype=np.float64)
+        # Per-cell material properties, expanded once since the distribution is static
+        self.density = self.material_density[material_ids].astype(self.dtype)
+        self.active = self.density > 0
+        # Compact index lists so the kernels only visit the cells they act on
+        self.active_idx = np.argwhere(self.active)
+        self.inactive_idx = np.argwhere(~self.active)
+        self.inv_density = np.zeros_like(self.density)
+        np.divide(1, self.density, out=self.inv_density, where=self.active)
+        self.lame_coefficient_1 = self.material_shear[material_ids].astype(self.dtype)
+        self.lame_coefficient_2 = (self.material_bulk[material_ids] - (2/3)*self.material_shear[material_ids]).astype(self.dtype)
+        if external_force_field.fields.dtype != self.dtype:
+            cast_forces = FieldGrid(self.columns, self.rows, nfields=2, dtype=self.dtype)
+            cast_forces.fields[:] = external_force_field.fields
+            external_force_field = cast_forces
         self.external_force_field = external_force_field
-        self.stresses: Grid[DataCell[StressTensor]] = Grid(int(total_length / dx), int(total_height / dx), DataCell, Tensor.zero())
-        self.strains: Grid[DataCell[Tensor]] = Grid(int(total_length / dx), int(total_height / dx), DataCell, Tensor.zero())
-        self.displacements: Grid[DataCell[Vector2]] = Grid(int(total_length / dx), int(total_height / dx), DataCell, Vector2(0, 0))
-        self.velocities: Grid[DataCell[Vector2]] = Grid(int(total_length / dx), int(total_height / dx), DataCell, Vector2(0, 0))
+        self.stresses = FieldGrid(self.columns, self.rows, nfields=3, dtype=self.dtype)
+        self.strains = FieldGrid(self.columns, self.rows, nfields=3, dtype=self.dtype)
+        self.displacements = FieldGrid(self.columns, self.rows, nfields=2, dtype=self.dtype)
+        self.velocities = FieldGrid(self.columns, self.rows, nfields=2, dtype=self.dtype)
+        if backend == 'gpu':
+            for grid in (self.external_force_field, self.stresses, self.strains, self.displacements, self.velocities):
+                grid.fields = cupy.asarray(grid.fields)
+            self.density = cupy.asarray(self.density)
+            self.active = cupy.asarray(self.active)
+            self.inv_density = cupy.asarray(self.inv_density)
+            self.lame_coefficient_1 = cupy.asarray(self.lame_coefficient_1)
+            self.lame_coefficient_2 = cupy.asarray(self.lame_coefficient_2)
         self.total_length = total_length
         self.total_height = total_height
         self.total_time = total_time
         self.current_time = 0
         self.dx = dx
         self.dt = dt
+        # Scalar constants pre-cast to the field dtype for the fused kernel
+        self._dt = self.dtype.type(dt)
+        self._inv_dx = self.dtype.type(1/dx)
+        self._half_inv_dx = self.dtype.type(0.5/dx)
+        # Kernel specialized for this grid shape, cell size and time step
+        if numba is not None and backend == 'cpu':
+            self._step_kernel = make_step_kernel(self.columns, self.rows, dx, dt, self.dtype)
+        else:
+            self._step_kernel = None
+        self._displacement_gradient = None
+        self._stress_divergence = None
+
+    def _get_displacement_gradient(self):
+        """ Gradient of the displacement field, cached until the displacements change """
+        if self._displacement_gradient is None:
+            self._displacement_gradient = vector_gradient(self.displacements[0], self.displacements[1], self.dx)
+        return self._displacement_gradient
+
+    def _get_stress_divergence(self):
+        """ Divergence of the stress field, cached until the stresses change """
+        if self._stress_divergence is None:
+            self._stress_divergence = tensor_divergence(self.stresses[0], self.stresses[1], self.stresses[2], self.dx)
+        return self._stress_divergence
 
     def get_material(self, i: int, j: int) -> Material:
-        return self.material_dist.get_cell(i, j).data
+        return self.materials[self.material_ids[j, i]]
 
-    def get_external_force(self, i: int, j: int):
-        return self.external_force_field.get_cell(i, j).data
+    def get_external_force(self, i: int, j: int) -> np.ndarray:
+        """ Returns the external force at (i, j) as a length-2 array """
+        return self.external_force_field.fields[:, j, i]
 
-    def get_u_double_dot(self, i: int, j: int):
-        if not self.get_material(i, j).density:
-            return GRAVITY
-        return (tensor_divergence(self.stresses, self.dx, i, j) + self.get_external_force(i, j)) * (1/self.get_material(i, j).density)
+    def get_u_double_dot(self, i: int, j: int) -> np.ndarray:
+        """ Returns the acceleration at (i, j) as a length-2 array """
+        if not self.active[j, i]:
+            return np.array([GRAVITY.x, GRAVITY.y], dtype=self.dtype)
+        div_x, div_y = self._get_stress_divergence()
+        div = np.array([div_x[j, i], div_y[j, i]])
+        return (div + self.get_external_force(i, j)) * self.inv_density[j, i]
 
-    def get_u_dot(self, i: int, j: int) -> Vector2:
-        return self.velocities.get_cell(i, j).data
+    def get_u_dot(self, i: int, j: int) -> np.ndarray:
+        """ Returns the velocity at (i, j) as a length-2 array """
+        return self.velocities.fields[:, j, i]
 
     def update_u_dot(self, r: range = None):
-        if r is None:
-            r = range(0, int(self.total_length/self.dx))
-        for column in self.velocities.cells:
-            for cell in column:
-                if cell.x in r:
-                    if not self.get_material(cell.x, cell.y).density:
-                        cell.data = self.current_time * GRAVITY
-                        continue
-                    cell.data += self.get_u_double_dot(cell.x, cell.y) * self.dt
+        sl = slice(None) if r is None else slice(r.start, r.stop)
+        div_x, div_y = self._get_stress_divergence()
+        vel_x, vel_y = self.velocities[0], self.velocities[1]
+        new_vel_x = vel_x + (div_x + self.external_force_field[0]) * self.inv_density * self.dt
+        new_vel_y = vel_y + (div_y + self.external_force_field[1]) * self.inv_density * self.dt
+        vel_x[:, sl] = np.where(self.active, new_vel_x, self.current_time * GRAVITY.x)[:, sl]
+        vel_y[:, sl] = np.where(self.active, new_vel_y, self.current_time * GRAVITY.y)[:, sl]
         return True
 
     def update_u(self, r: range = None):
-        if r is None:
-            r = range(0, int(self.total_length/self.dx))
-        for column in self.displacements.cells:
-            for cell in column:
-                if cell.x in r:
-                    if not self.get_material(cell.x, cell.y).density:
-                        cell.data = 0.5 * self.current_time**2 * GRAVITY
-                        continue
-                    cell.data += self.get_u_dot(cell.x, cell.y) * self.dt
+        sl = slice(None) if r is None else slice(r.start, r.stop)
+        active = self.active
+        disp_x, disp_y = self.displacements[0], self.displacements[1]
+        vel_x, vel_y = self.velocities[0], self.velocities[1]
+        disp_x[:, sl] = np.where(active, disp_x + vel_x*self.dt, 0.5 * self.current_time**2 * GRAVITY.x)[:, sl]
+        disp_y[:, sl] = np.where(active, disp_y + vel_y*self.dt, 0.5 * self.current_time**2 * GRAVITY.y)[:, sl]
+        self._displacement_gradient = None
         return True
 
-    def get_strain(self, i: int, j: int) -> Tensor:
-        grad_u = vector_gradient(self.displacements, self.dx, i, j)
-        grad_u_transpose = grad_u.transpose
-        return 0.5*(grad_u + grad_u_transpose)
+    def get_strain(self, i: int, j: int) -> np.ndarray:
+        """ Returns the 2x2 strain tensor at (i, j) as an array """
+        pxx, pxy, pyx, pyy = self._get_displacement_gradient()
+        shear = 0.5*(pxy[j, i] + pyx[j, i])
+        return np.array([[pxx[j, i], shear], [shear, pyy[j, i]]])
 
     def update_strain(self, r: range = None):
-        if r is None:
-            r = range(0, int(self.total_length/self.dx))
-        for column in self.strains.cells:
-            for cell in column:
-                if cell.x in r:
-                    if not self.get_material(cell.x, cell.y).density:
-                        continue
-                    cell.data = self.get_strain(cell.x, cell.y)
+        sl = slice(None) if r is None else slice(r.start, r.stop)
+        active = self.active
+        pxx, pxy, pyx, pyy = self._get_displacement_gradient()
+        shear = 0.5*(pxy + pyx)
+        self.strains[0][:, sl] = np.where(active, pxx, self.strains[0])[:, sl]
+        self.strains[1][:, sl] = np.where(active, shear, self.strains[1])[:, sl]
+        self.strains[2][:, sl] = np.where(active, pyy, self.strains[2])[:, sl]
+        return True
+
+    def update_strain_stress(self, r: range = None):
+        """ Fused strain and stress update: computes the displacement gradient once and writes both fields in one pass """
+        sl = slice(None) if r is None else slice(r.start, r.stop)
+        active = self.active
+        pxx, pxy, pyx, pyy = self._get_displacement_gradient()
+        shear_strain = 0.5*(pxy + pyx)
+        lame_coefficient_1 = self.lame_coefficient_1
+        lame_coefficient_2 = self.lame_coefficient_2
+        strain_trace = pxx + pyy
+        self.strains[0][:, sl] = np.where(active, pxx, self.strains[0])[:, sl]
+        self.strains[1][:, sl] = np.where(active, shear_strain, self.strains[1])[:, sl]
+        self.strains[2][:, sl] = np.where(active, pyy, self.strains[2])[:, sl]
+        self.stresses[0][:, sl] = np.where(active, 2*lame_coefficient_1*pxx + lame_coefficient_2*strain_trace, self.stresses[0])[:, sl]
+        self.stresses[1][:, sl] = np.where(active, 2*lame_coefficient_1*shear_strain, self.stresses[1])[:, sl]
+        self.stresses[2][:, sl] = np.where(active, 2*lame_coefficient_1*pyy + lame_coefficient_2*strain_trace, self.stresses[2])[:, sl]
+        self._stress_divergence = None
         return True
 
-    def get_stress(self, i: int, j: int) -> Tensor:
-        strain = self.strains.get_cell(i, j).data
-        strain_trace = strain.trace
-        lame_coefficient_1 = self.get_material(i, j).shear_modulus
-        lame_coefficient_2 = self.get_material(i, j).bulk_modulus - (2/3)*lame_coefficient_1
-        return 2*lame_coefficient_1*strain + lame_coefficient_2*strain_trace*Tensor.identity()
+    def get_stress(self, i: int, j: int) -> np.ndarray:
+        """ Returns the 2x2 stress tensor at (i, j) as an array """
+        exx, exy, eyy = self.strains[0, j, i], self.strains[1, j, i], self.strains[2, j, i]
+        lame_coefficient_1 = self.lame_coefficient_1[j, i]
+        lame_coefficient_2 = self.lame_coefficient_2[j, i]
+        pressure = lame_coefficient_2*(exx + eyy)
+        return np.array([
+            [2*lame_coefficient_1*exx + pressure, 2*lame_coefficient_1*exy],
+            [2*lame_coefficient_1*exy, 2*lame_coefficient_1*eyy + pressure]
+        ])
 
     def update_stress(self, r: range = None):
-        if r is None:
-            r = range(0, int(self.total_length/self.dx))
-        for column in self.stresses.cells:
-            for cell in column:
-                if cell.x in r:
-                    if not self.get_material(cell.x, cell.y).density:
-                        continue
-                    cell.data = self.get_stress(cell.x, cell.y)
+        sl = slice(None) if r is None else slice(r.start, r.stop)
+        active = self.active
+        lame_coefficient_1 = self.lame_coefficient_1
+        lame_coefficient_2 = self.lame_coefficient_2
+        strain_trace = self.strains[0] + self.strains[2]
+        self.stresses[0][:, sl] = np.where(active, 2*lame_coefficient_1*self.strains[0] + lame_coefficient_2*strain_trace, self.stresses[0])[:, sl]
+        self.stresses[1][:, sl] = np.where(active, 2*lame_coefficient_1*self.strains[1], self.stresses[1])[:, sl]
+        self.stresses[2][:, sl] = np.where(active, 2*lame_coefficient_1*self.strains[2] + lame_coefficient_2*strain_trace, self.stresses[2])[:, sl]
+        self._stress_divergence = None
         return True
 
     def step(self):
-        self.update_u()
-        self.update_u_dot()
-        self.update_strain()
-        self.update_stress()
+        if self._step_kernel is None:
+            self.update_u()
+            self.update_u_dot()
+            self.update_strain_stress()
+        else:
+            self._step_kernel(
+                self.displacements[0], self.displacements[1],
+                self.velocities[0], self.velocities[1],
+                self.strains[0], self.strains[1], self.strains[2],
+                self.stresses[0], self.stresses[1], self.stresses[2],
+                self.external_force_field[0], self.external_force_field[1],
+                self.inv_density,
+                self.lame_coefficient_1, self.lame_coefficient_2,
+                self.active_idx, self.inactive_idx,
+                self.dtype.type(GRAVITY.x), self.dtype.type(GRAVITY.y),
+                self.dtype.type(self.current_time)
+            )
+            self._displacement_gradient = None
+            self._stress_divergence = None
         self.current_time += self.dt
         return
\ No newline at end of file
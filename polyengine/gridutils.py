@@ -1,6 +1,7 @@
-import copy
 from typing import TypeVar
 
+import numpy as np
+
 class Cell:
     def __init__(self, position):
         self.position = tuple(position)[0:2]
@@ -31,7 +32,7 @@ class Grid[C]:
     ]
     """
     def __init__(self, columns, rows, cell_cls, *cell_args, **cell_kwargs):
-        self.cells = [[Cell([0, 0])] * columns] * rows
+        self.cells = [[None]*columns for _ in range(rows)]
         self.cell_cls = cell_cls
         self.cell_args = cell_args
         self.cell_kwargs = cell_kwargs
@@ -40,14 +41,23 @@ class Grid[C]:
         for i in range(rows):
             for j in range(columns):
                 cell = cell_cls((j, i), *cell_args, *cell_kwargs)
-                self.replace_cell(i, j, cell)
+                self.replace_cell(j, i, cell)
     def __str__(self):
         return f'{[[c for c in r] for r in self.cells]}'
+    @classmethod
+    def from_cells(cls, cells, cell_cls=Cell, *cell_args, **cell_kwargs):
+        """ Builds a grid around an existing nested list of cells, without constructing any new cells """
+        grid = cls.__new__(cls)
+        grid.cells = cells
+        grid.cell_cls = cell_cls
+        grid.cell_args = cell_args
+        grid.cell_kwargs = cell_kwargs
+        grid.row_end = len(cells)-1
+        grid.column_end = len(cells[0])-1
+        return grid
     def replace_cell(self, column, row, cell):
         """ Replaces the cell at position (column, row) with a new cell """
-        r = copy.copy(self.cells[column])
-        r[row] = cell
-        self.cells[column] = r
+        self.cells[row][column] = cell
     def get_cell(self, column, row):
         """ Returns the cell at position (column, row) """
         if row not in range(len(self.get_column(0))) or column not in range(len(self.get_row(0))):
@@ -62,9 +72,36 @@ class Grid[C]:
         return [r[column] for r in self.cells]
     def get_neighbors(self, column, row):
         """ Returns a 3x3 grid of the neighbors of the cell at (column, row) """
-        local_grid = Grid(3, 3, self.cell_cls, *self.cell_args, **self.cell_kwargs)
-        for i in range(3):
-            for j in range(3):
-                c = self.get_cell(column+i-1, row+j-1)
-                local_grid.replace_cell(j, i, c)
-        return local_grid
\ No newline at end of file
+        cells = [[self.get_cell(column+i-1, row+j-1) for i in range(3)] for j in range(3)]
+        return Grid.from_cells(cells, self.cell_cls, *self.cell_args, **self.cell_kwargs)
+
+
+class FieldGrid:
+    """
+    A grid of scalar fields stored structure-of-arrays style. All fields live in
+    one array of shape (nfields, rows, columns), so each field is a contiguous
+    2D block indexed [row, column]. For example:
+    FieldGrid(2, 3, nfields=2) stores two 3x2 fields of zeros.
+    """
+    def __init__(self, columns, rows, nfields=1, dtype=np.float64):
+        self.fields = np.zeros((nfields, rows, columns), dtype=dtype)
+        self.nfields = nfields
+        self.row_end = rows-1
+        self.column_end = columns-1
+
+    def __repr__(self):
+        return f'FieldGrid({self.column_end+1}, {self.row_end+1}, nfields={self.nfields})'
+
+    def __getitem__(self, index):
+        return self.fields[index]
+
+    def __setitem__(self, index, value):
+        self.fields[index] = value
+
+    def field(self, f):
+        """ Returns the full 2D array of field f, as a view. """
+        return self.fields[f]
+
+    def neighborhood(self, f, column, row):
+        """ Returns a view of the 3x3 (or smaller, at edges) neighborhood of field f around (column, row) """
+        return self.fields[f, max(row-1, 0):row+2, max(column-1, 0):column+2]
\ No newline at end of file
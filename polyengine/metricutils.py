@@ -1,20 +1,23 @@
 import math
+import operator
 from typing import Optional, Union, Generic, TypeVar, Type, Sequence
 
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+from ._geom_kernels import INEQUALITY_CODES, _angle_rad, _region_contains, _region_mask, _segment_contains, _segment_contains_batch, pairwise_distances
+
 __doc__ = """
 Implements geometric primitives, vectors, and units.
 """
 
-def zip_indices(obj: Sequence):
-    """
-    Zip a sequence with its indices.
-    :param obj:
-    :return:
-    """
-    return zip(obj, range(len(obj)))
-
-
 class Vector2:
+    __slots__ = ('x', 'y')
+
     def __init__(self, x, y):
         """
         A 2D vector.
@@ -41,14 +44,14 @@ class Vector2:
         :param other:
         :return:
         """
-        return self + -other
+        return Vector2(self.x - other.x, self.y - other.y)
 
     def __neg__(self):
         """
         Scale a vector by -1.
         :return:
         """
-        return (-1)*self
+        return Vector2(-self.x, -self.y)
 
     def __mul__(self, other):
         """
@@ -56,6 +59,9 @@ class Vector2:
         :param other:
         :return:
         """
+        if type(other) is float or type(other) is int:
+            # Exact-type check first: scaling is the common case
+            return Vector2(self.x * other, self.y * other)
         if isinstance(other, Vector2):
             return self.x * other.x + self.y * other.y
         if isinstance(other, float) or isinstance(other, int):
@@ -65,6 +71,22 @@ class Vector2:
     def __rmul__(self, other):
         return self * other
 
+    def dot(self, other) -> float:
+        """
+        Dot product with another vector, without the __mul__ dispatch.
+        :param other:
+        :return:
+        """
+        return self.x * other.x + self.y * other.y
+
+    def scale(self, factor: float):
+        """
+        Scale by a number, without the __mul__ dispatch.
+        :param factor:
+        :return:
+        """
+        return Vector2(self.x * factor, self.y * factor)
+
     def __truediv__(self, other):
         return self.x / other, self.y / other
 
@@ -73,40 +95,152 @@ class Vector2:
         Take the norm of a vector.
         :return:
         """
-        return math.sqrt(self * self)
+        return math.hypot(self.x, self.y)
 
     def to_tuple(self):
         return self.x, self.y
 
 
-def get_distance(pos1: Vector2, pos2: Vector2) -> float:
+class Vector2Array:
+    """
+    A batch of 2D vectors stored structure-of-arrays style, as contiguous
+    xs and ys columns. Arithmetic is component-wise over the whole batch.
+    """
+    __slots__ = ('xs', 'ys')
+
+    def __init__(self, xs, ys):
+        self.xs = np.ascontiguousarray(xs, dtype=np.float64)
+        self.ys = np.ascontiguousarray(ys, dtype=np.float64)
+
+    def __repr__(self):
+        return f'Vector2Array[{len(self.xs)}]'
+
+    def __len__(self):
+        return len(self.xs)
+
+    def __getitem__(self, index) -> Vector2:
+        return Vector2(self.xs[index], self.ys[index])
+
+    def __add__(self, other):
+        return Vector2Array(self.xs + other.xs, self.ys + other.ys)
+
+    def __sub__(self, other):
+        return Vector2Array(self.xs - other.xs, self.ys - other.ys)
+
+    def __neg__(self):
+        return Vector2Array(-self.xs, -self.ys)
+
+    def __abs__(self):
+        return np.hypot(self.xs, self.ys)
+
+    def dot(self, other) -> np.ndarray:
+        """
+        Element-wise dot products with another batch.
+        :param other:
+        :return:
+        """
+        return self.xs*other.xs + self.ys*other.ys
+
+    def scale(self, factor):
+        """
+        Scale the whole batch by a number or a per-vector array.
+        :param factor:
+        :return:
+        """
+        return Vector2Array(self.xs * factor, self.ys * factor)
+
+    def norm(self) -> np.ndarray:
+        """ Norms of the whole batch, one np.hypot over the columns """
+        return np.hypot(self.xs, self.ys)
+
+    @classmethod
+    def from_vectors(cls, vectors: Sequence[Vector2]):
+        """ Builds a batch from a sequence of Vector2 """
+        return cls([v.x for v in vectors], [v.y for v in vectors])
+
+
+def get_distance(pos1, pos2):
     """
-    Gets the distance between two points.
+    Gets the distance between two points, or element-wise between two batches.
     :param pos1:
     :param pos2:
     :return:
     """
-    return abs(pos2-pos1)
+    if isinstance(pos1, Vector2Array):
+        return np.hypot(pos2.xs-pos1.xs, pos2.ys-pos1.ys)
+    return math.hypot(pos2.x-pos1.x, pos2.y-pos1.y)
 
 
-def get_angle(pos1: Vector2, pos2: Vector2, center: Vector2 = Vector2(0, 0)) -> float:
+def get_angle(pos1, pos2, center=Vector2(0, 0)):
     """
-    Gets the angle two points make when connected to a center point.
+    Gets the angle two points make when connected to a center point, element-wise for batches.
     Unit options are rad, deg, and turns.
     :param pos1:
     :param pos2:
     :param center:
     :return:
     """
-    vector1 = pos1-center
-    vector2 = pos2-center
-    norm_prod = abs(vector1)*abs(vector2)
-    dot_prod = vector1 * vector2
-    angle = math.acos(dot_prod/norm_prod)
-    return angle
+    if isinstance(pos1, Vector2Array):
+        center_x, center_y = (center.xs, center.ys) if isinstance(center, Vector2Array) else (center.x, center.y)
+        return get_angle_batch(pos1.xs, pos1.ys, pos2.xs, pos2.ys, center_x, center_y)
+    return _angle_rad(pos1.x, pos1.y, pos2.x, pos2.y, center.x, center.y)
+
+
+def get_distance_batch(xs1: np.ndarray, ys1: np.ndarray, xs2: np.ndarray, ys2: np.ndarray) -> np.ndarray:
+    """
+    Gets the distances between two batches of points, held as coordinate arrays.
+    :param xs1:
+    :param ys1:
+    :param xs2:
+    :param ys2:
+    :return:
+    """
+    return np.hypot(xs2-xs1, ys2-ys1)
+
+
+def get_all_distances(points: Vector2Array) -> np.ndarray:
+    """
+    Gets the full (n, n) matrix of distances between all pairs of points in a batch.
+    :param points:
+    :return:
+    """
+    n = len(points)
+    out = np.empty((n, n))
+    pairwise_distances(points.xs, points.ys, out)
+    return out
+
+
+def get_angle_batch(xs1, ys1, xs2, ys2, center_x=0.0, center_y=0.0) -> np.ndarray:
+    """
+    Gets the angles batches of point pairs make when connected to a center point.
+    :param xs1:
+    :param ys1:
+    :param xs2:
+    :param ys2:
+    :param center_x:
+    :param center_y:
+    :return:
+    """
+    dx1, dy1 = xs1-center_x, ys1-center_y
+    dx2, dy2 = xs2-center_x, ys2-center_y
+    # atan2 of cross and dot: no sqrt, and stable for near-collinear points
+    cross = dx1*dy2 - dy1*dx2
+    dot_prod = dx1*dx2 + dy1*dy2
+    return np.arctan2(np.abs(cross), dot_prod)
+
+
+# Comparison callables keyed by inequality: scalar operators for Condition, ufuncs for the vectorized containment masks
+_OPS = {'==': operator.eq, '>': operator.gt, '>=': operator.ge, '<=': operator.le, '<': operator.lt}
+_INEQUALITY_UFUNCS = {'==': np.equal, '>': np.greater, '>=': np.greater_equal, '<=': np.less_equal, '<': np.less}
+
+# Inverse of the kernel op codes, plus the codes whose operators include equality
+_INEQUALITY_FROM_CODE = {code: inequality for inequality, code in INEQUALITY_CODES.items()}
+_EQUALITY_OPS = frozenset(INEQUALITY_CODES[inequality] for inequality in ('==', '>=', '<='))
 
 
 class Condition:
+    __slots__ = ('constant', '_op', 'op_code')
+
     def __init__(self, constant: float, inequality: str):
         """
         Wraps an inequality.
@@ -114,11 +248,20 @@ class Condition:
         :param constant:
         :param inequality:
         """
-        if inequality not in {'==', '>', '>=', '<=', '<'}:
+        if inequality not in _OPS:
             raise ValueError('Invalid inequality.')
         self.constant = constant
-        self.inequality = inequality
-        self.strict = '=' in inequality
+        # Bind the comparison once instead of re-dispatching on the string per call
+        self._op = _OPS[inequality]
+        self.op_code = INEQUALITY_CODES[inequality]
+
+    @property
+    def inequality(self) -> str:
+        return _INEQUALITY_FROM_CODE[self.op_code]
+
+    @property
+    def strict(self) -> bool:
+        return self.op_code in _EQUALITY_OPS
 
     def __call__(self, value: float) -> bool:
         """
@@ -126,23 +269,29 @@ class Condition:
         :param value:
         :return:
         """
-        match self.inequality:
-            case '==':
-                return value == self.constant
-            case '>=':
-                return value >= self.constant
-            case '<=':
-                return value <= self.constant
-            case '>':
-                return value > self.constant
-            case '<':
-                return value < self.constant
+        return self._op(value, self.constant)
 
 
-class Primitive(set):
+# Conditions are immutable, so every region comparing against 0 shares one of these five
+_ZERO_CONDITIONS = {inequality: Condition(0, inequality) for inequality in _OPS}
+
+
+def points_from_meshgrid(grid_x: np.ndarray, grid_y: np.ndarray) -> np.ndarray:
+    """
+    Flattens a meshgrid pair into the (N, 2) point array contains_batch expects.
+    :param grid_x:
+    :param grid_y:
+    :return:
+    """
+    return np.column_stack((np.ravel(grid_x), np.ravel(grid_y)))
+
+
+class Primitive:
     """
     Root of all geometric objects.
     """
+    __slots__ = ()
+
     def in_set(self, point: Vector2) -> bool:
         """
         Returns true if point is inside primitive.
@@ -150,11 +299,38 @@ class Primitive(set):
         """
         return False
 
+    def in_set_many(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Returns a boolean mask of which points are inside the primitive.
+        :param xs:
+        :param ys:
+        :return:
+        """
+        return np.zeros(np.shape(xs), dtype=bool)
+
+    def in_set_batch(self, points: Vector2Array) -> np.ndarray:
+        """
+        Returns a boolean mask of which vectors in a batch are inside the primitive.
+        :param points:
+        :return:
+        """
+        return self.in_set_many(points.xs, points.ys)
+
+    def contains_batch(self, points: np.ndarray) -> np.ndarray:
+        """
+        Returns a boolean mask for an (N, 2) array of point coordinates.
+        :param points:
+        :return:
+        """
+        return self.in_set_many(points[:, 0], points[:, 1])
+
     def __contains__(self, item):
         return self.in_set(item)
 
 
 class Region(Primitive):
+    __slots__ = ('c1', 'c2', 'c3', 'coefficients', 'condition', 'op_code')
+
     def __init__(self, c1: float, c2: float, c3: float, inequality: str):
         """
         A region defined by the line c1*x + c2*y + c3 == 0
@@ -165,9 +341,12 @@ class Region(Primitive):
         """
         if c1 == c2 == 0:
             raise ValueError('Invalid line. c1 and c2 cannot be both 0.')
+        # Separate attributes for the hot predicates, with the tuple kept for callers that want all three
+        self.c1, self.c2, self.c3 = c1, c2, c3
         self.coefficients = (c1, c2, c3)
-        self.condition = Condition(0, inequality)
-        super().__init__()
+        # Shared interned instance for valid inequalities; the constructor call only serves to raise for invalid ones
+        self.condition = _ZERO_CONDITIONS.get(inequality) or Condition(0, inequality)
+        self.op_code = self.condition.op_code
 
     def in_set(self, point: Vector2) -> bool:
         """
@@ -175,8 +354,22 @@ class Region(Primitive):
         :param point:
         :return:
         """
-        c1, c2, c0 = self.coefficients
-        return self.condition(c1 * point.x + c2 * point.y + c0)
+        return bool(_region_contains(self.c1, self.c2, self.c3, self.op_code, point.x, point.y))
+
+    def in_set_many(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Returns a boolean mask of which points are in the defined region or set.
+        :param xs:
+        :param ys:
+        :return:
+        """
+        if numba is not None:
+            # Fused parallel loop: no intermediate c1*xs + c2*ys + c3 array
+            out = np.empty(np.shape(xs), dtype=np.bool_)
+            _region_mask(self.c1, self.c2, self.c3, self.op_code,
+                         np.ascontiguousarray(xs, dtype=np.float64), np.ascontiguousarray(ys, dtype=np.float64), out)
+            return out
+        return _INEQUALITY_UFUNCS[self.condition.inequality](self.c1*xs + self.c2*ys + self.c3, 0)
 
     @classmethod
     def from_slope_intercept(cls, slope: float, intercept: float, inequality: str):
@@ -191,6 +384,8 @@ class Region(Primitive):
 
 
 class Line(Region):
+    __slots__ = ()
+
     def __init__(self, c1: float, c2: float, c3: float):
         """
         The line defined by c1*x + c2*y + c3 == 0
@@ -201,25 +396,19 @@ class Line(Region):
         super().__init__(c1, c2, c3, '==')
 
     def __eq__(self, other) -> bool:
-        # Unpack coefficients
+        # Lines are equal iff their coefficient triples are proportional; cross-products avoid division entirely
         self_c1, self_c2, self_c3 = self.coefficients
         other_c1, other_c2, other_c3 = other.coefficients
-        # Test if coefficients are both zero or non-zero
-        if not all((
-                (self_c1 and other_c1 or self_c1 == other_c1 == 0),
-                (self_c2 and other_c2 or self_c2 == other_c2 == 0),
-                (self_c3 and other_c3 or self_c3 == other_c3 == 0),
-        )):
-            return False
-        # Test if the ratios of the coefficients are the same
-        elif 0 in {self_c1, self_c2}:
-            self_nonzero, other_nonzero = (self_c1, other_c1) if self_c1 else (self_c2, other_c2)
-            return self_c3/self_nonzero == other_c3/other_nonzero
-        else:
-            return self_c3/self_c1 == other_c3/other_c1 and self_c3/self_c2 == other_c3/other_c2 and self_c1/self_c2 == other_c1/other_c2
+        return (
+                self_c1*other_c2 == other_c1*self_c2
+                and self_c1*other_c3 == other_c1*self_c3
+                and self_c2*other_c3 == other_c2*self_c3
+        )
 
 
 class Segment(Line):
+    __slots__ = ('p1', 'p2', 'xmin', 'xmax', 'ymin', 'ymax')
+
     def __init__(self, p1: Vector2, p2: Vector2):
         """
         A line segment between two points.
@@ -230,12 +419,15 @@ class Segment(Line):
             raise ValueError('Segment must consist of distinct points.')
         x0, y0 = p1.x, p1.y
         x1, y1 = p2.x, p2.y
-        # Calculate coefficients
+        # Calculate coefficients of the two-point line form (y1-y0)x + (x0-x1)y + (x1*y0 - x0*y1) = 0
         c1 = y1-y0
         c2 = x0-x1
-        c3 = y0*x1+x1*y1-x0*y1-y1*x1
+        c3 = x1*y0-x0*y1
         self.p1 = p1
         self.p2 = p2
+        # Bounding box, precomputed once so containment tests are branchless
+        self.xmin, self.xmax = min(x0, x1), max(x0, x1)
+        self.ymin, self.ymax = min(y0, y1), max(y0, y1)
         super().__init__(c1, c2, c3)
 
     def __eq__(self, other) -> bool:
@@ -249,32 +441,22 @@ class Segment(Line):
         return Line(*self.coefficients)
 
     def in_set(self, point: Vector2) -> bool:
-        inequalities: tuple[tuple[str, str], tuple[str, str]] = ((), ())
-        # Ensures the inequalities are in the right order, in case the points were given in the wrong order
-        match [self.p2.x > self.p1.x, self.p2.y > self.p1.y]:
-            case [True, True]:
-                inequalities = (('>=', '<='), ('>=', '<='))
-            case [True, False]:
-                inequalities = (('>=', '<='), ('<=', '>='))
-            case [False, True]:
-                inequalities = (('<=', '>='), ('>=', '<='))
-            case [False, False]:
-                inequalities = (('<=', '>='), ('<=', '>='))
-        # Conditions check if the point is within a bounding box formed by the segment endpoints, but the inequalities must match the order of the endpoints
-        condition_x0 = Condition(self.p1.x, inequalities[0][0])
-        condition_y0 = Condition(self.p1.y, inequalities[1][0])
-        condition_x1 = Condition(self.p2.x, inequalities[0][1])
-        condition_y1 = Condition(self.p2.y, inequalities[1][1])
-        return all((
-            super().in_set(point),
-            condition_x0(point.x),
-            condition_x1(point.x),
-            condition_y0(point.y),
-            condition_y1(point.y),
-        ))
+        c1, c2, c3 = self.coefficients
+        return bool(_segment_contains(c1, c2, c3, self.xmin, self.xmax, self.ymin, self.ymax, point.x, point.y))
+
+    def in_set_many(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        if numba is not None:
+            # Fused compiled loop: one pass over the coordinates instead of five intermediate masks
+            out = np.empty(np.shape(xs), dtype=np.bool_)
+            _segment_contains_batch(self.c1, self.c2, self.c3, self.xmin, self.xmax, self.ymin, self.ymax,
+                                    np.ascontiguousarray(xs, dtype=np.float64), np.ascontiguousarray(ys, dtype=np.float64), out)
+            return out
+        return super().in_set_many(xs, ys) & (xs >= self.xmin) & (xs <= self.xmax) & (ys >= self.ymin) & (ys <= self.ymax)
 
 
 class Ray(Line):
+    __slots__ = ('direction', 'dir_region')
+
     def __init__(self, c1: float, c2: float, c3: float, direction: str = '+'):
         """
         A directed line.
@@ -294,3 +476,6 @@ class Ray(Line):
 
     def in_set(self, point: Vector2) -> bool:
         return super().in_set(point) and point in self.dir_region
+
+    def in_set_many(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        return super().in_set_many(xs, ys) & self.dir_region.in_set_many(xs, ys)
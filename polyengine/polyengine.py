@@ -1,27 +1,241 @@
 import math
 
+import numpy as np
+
 from .metricutils import *
-from diffequations import *
+from .diffequations import *
 from typing import List
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    import cupy
+except ImportError:
+    cupy = None
+
 __doc__ = """
 Implement physics engine.
 """
 
+# Initial column capacity for the growable state arrays
+_INITIAL_CAPACITY = 16
+
+
+if numba is not None:
+    # Kernels are memoized per (topology, timestep, stiffness, dtype); closures cannot
+    # use cache=True, so the dict also avoids recompiling for repeated runs in-process
+    _step_kernel_cache = {}
+
+    def make_step_kernel(n_joints: int, n_rods: int, stiffness: float, dt: float, dtype=np.float32):
+        """
+        Builds a velocity Verlet step kernel specialized to a fixed topology,
+        timestep and stiffness, so the loop bounds and scalars are compile-time
+        constants for LLVM.
+        :param n_joints:
+        :param n_rods:
+        :param stiffness:
+        :param dt:
+        :param dtype:
+        :return:
+        """
+        key = (n_joints, n_rods, float(stiffness), float(dt), np.dtype(dtype).str)
+        kernel = _step_kernel_cache.get(key)
+        if kernel is not None:
+            return kernel
+        # Constants pre-cast to the column dtype so the update runs without upcasts
+        stiffness = np.dtype(dtype).type(stiffness)
+        dt = np.dtype(dtype).type(dt)
+        half_dt = np.dtype(dtype).type(0.5*float(dt))
+        one = np.dtype(dtype).type(1)
+
+        @numba.njit(parallel=True, fastmath=True)
+        def step_kernel(pos_x, pos_y, vel_x, vel_y, inv_mass, fx, fy, ext_fx, ext_fy,
+                        j1_idx, j2_idx, rest_len, rod_fx, rod_fy):
+            """ Advance one frame with velocity Verlet: half-kick and drift, new forces, half-kick """
+            # fx/fy hold the forces at the current positions; consume them in the first
+            # half-kick, then refill the same buffers with the forces at the new positions
+            for i in numba.prange(n_joints):
+                vel_x[i] += half_dt*fx[i]*inv_mass[i]
+                vel_y[i] += half_dt*fy[i]*inv_mass[i]
+                pos_x[i] += dt*vel_x[i]
+                pos_y[i] += dt*vel_y[i]
+                fx[i] = ext_fx[i]
+                fy[i] = ext_fy[i]
+            # Per-rod forces go into race-free scratch; the scatter into shared joints stays serial
+            for k in numba.prange(n_rods):
+                dx = pos_x[j2_idx[k]] - pos_x[j1_idx[k]]
+                dy = pos_y[j2_idx[k]] - pos_y[j1_idx[k]]
+                # Plain sqrt (not hypot, whose overflow guards block rsqrt) so
+                # fastmath can fuse the normalize into a reciprocal square root
+                inv_length = one/math.sqrt(dx*dx + dy*dy)
+                magnitude = stiffness*(one - rest_len[k]*inv_length)
+                rod_fx[k] = magnitude*dx
+                rod_fy[k] = magnitude*dy
+            for k in range(n_rods):
+                fx[j1_idx[k]] += rod_fx[k]
+                fy[j1_idx[k]] += rod_fy[k]
+                fx[j2_idx[k]] -= rod_fx[k]
+                fy[j2_idx[k]] -= rod_fy[k]
+            for i in numba.prange(n_joints):
+                vel_x[i] += half_dt*fx[i]*inv_mass[i]
+                vel_y[i] += half_dt*fy[i]*inv_mass[i]
+
+        _step_kernel_cache[key] = step_kernel
+        return step_kernel
+
+
+class JointArrays:
+    def __init__(self, dtype=np.float32):
+        """
+        Structure-of-arrays storage for the joints of a state.
+        Each physical quantity is a contiguous column indexed by joint number.
+        :param dtype:
+        """
+        self.size = 0
+        self.capacity = _INITIAL_CAPACITY
+        self.dtype = np.dtype(dtype)
+        self.pos_x = np.empty(self.capacity, dtype=self.dtype)
+        self.pos_y = np.empty(self.capacity, dtype=self.dtype)
+        self.vel_x = np.zeros(self.capacity, dtype=self.dtype)
+        self.vel_y = np.zeros(self.capacity, dtype=self.dtype)
+        self.mass = np.empty(self.capacity, dtype=self.dtype)
+        self.inv_mass = np.empty(self.capacity, dtype=self.dtype)
+        self.fx = np.zeros(self.capacity, dtype=self.dtype)
+        self.fy = np.zeros(self.capacity, dtype=self.dtype)
+        self.ext_fx = np.zeros(self.capacity, dtype=self.dtype)
+        self.ext_fy = np.zeros(self.capacity, dtype=self.dtype)
+
+    def _grow(self):
+        self.capacity *= 2
+        for name in ('pos_x', 'pos_y', 'vel_x', 'vel_y', 'mass', 'inv_mass', 'fx', 'fy', 'ext_fx', 'ext_fy'):
+            column = getattr(self, name)
+            new_column = np.zeros(self.capacity, dtype=column.dtype)
+            new_column[:self.size] = column[:self.size]
+            setattr(self, name, new_column)
+
+    def append(self, x: float, y: float, mass: float) -> int:
+        """
+        Append a joint and return its index.
+        :param x:
+        :param y:
+        :param mass:
+        :return:
+        """
+        if self.size == self.capacity:
+            self._grow()
+        index = self.size
+        self.pos_x[index] = x
+        self.pos_y[index] = y
+        self.vel_x[index] = 0
+        self.vel_y[index] = 0
+        self.mass[index] = mass
+        self.inv_mass[index] = 1/mass
+        self.fx[index] = 0
+        self.fy[index] = 0
+        self.ext_fx[index] = 0
+        self.ext_fy[index] = 0
+        self.size += 1
+        return index
+
+    def extend(self, xs: np.ndarray, ys: np.ndarray, masses: np.ndarray) -> np.ndarray:
+        """
+        Append many joints at once and return their indices.
+        :param xs:
+        :param ys:
+        :param masses:
+        :return:
+        """
+        n_new = xs.shape[0]
+        while self.capacity < self.size + n_new:
+            self._grow()
+        start = self.size
+        stop = start + n_new
+        self.pos_x[start:stop] = xs
+        self.pos_y[start:stop] = ys
+        self.mass[start:stop] = masses
+        np.reciprocal(self.mass[start:stop], out=self.inv_mass[start:stop])
+        for name in ('vel_x', 'vel_y', 'fx', 'fy', 'ext_fx', 'ext_fy'):
+            getattr(self, name)[start:stop] = 0
+        self.size = stop
+        return np.arange(start, stop, dtype=np.intp)
+
+
+class RodArrays:
+    def __init__(self, dtype=np.float32):
+        """
+        Structure-of-arrays storage for the rods of a state.
+        :param dtype:
+        """
+        self.size = 0
+        self.capacity = _INITIAL_CAPACITY
+        self.dtype = np.dtype(dtype)
+        self.j1_idx = np.empty(self.capacity, dtype=np.intp)
+        self.j2_idx = np.empty(self.capacity, dtype=np.intp)
+        self.rest_len = np.empty(self.capacity, dtype=self.dtype)
+
+    def _grow(self):
+        self.capacity *= 2
+        for name in ('j1_idx', 'j2_idx', 'rest_len'):
+            column = getattr(self, name)
+            new_column = np.zeros(self.capacity, dtype=column.dtype)
+            new_column[:self.size] = column[:self.size]
+            setattr(self, name, new_column)
+
+    def append(self, j1_idx: int, j2_idx: int, rest_len: float) -> int:
+        """
+        Append a rod and return its index.
+        :param j1_idx:
+        :param j2_idx:
+        :param rest_len:
+        :return:
+        """
+        if self.size == self.capacity:
+            self._grow()
+        index = self.size
+        self.j1_idx[index] = j1_idx
+        self.j2_idx[index] = j2_idx
+        self.rest_len[index] = rest_len
+        self.size += 1
+        return index
+
 
 class Joint:
-    def __init__(self, pos: Vector2, material: Material, radius: float, thickness: float):
+    __slots__ = ('state', 'material', 'radius', 'thickness', 'idx', 'connections')
+
+    def __init__(self, state, pos: Vector2, material: Material, radius: float, thickness: float):
         """
         A joint that connects one or more rods.
+        A thin handle over a row of the state's joint arrays.
+        :param state:
         :param pos:
         """
-        self.pos = pos
+        self.state = state
         self.material = material
         self.radius = radius
         self.thickness = thickness
-        self.mass = math.pi * radius**2 * thickness * material.density
+        self.idx = state.joints.append(pos.x, pos.y, math.pi * radius**2 * thickness * material.density)
         self.connections: List[Rod] = []
-        self.forces: List[Vector2] = []
+
+    @property
+    def pos(self) -> Vector2:
+        return Vector2(self.state.joints.pos_x[self.idx], self.state.joints.pos_y[self.idx])
+
+    @property
+    def mass(self) -> float:
+        return self.state.joints.mass[self.idx]
+
+    def apply_force(self, force: Vector2):
+        """
+        Apply a persistent external force to the joint, accumulated straight
+        into the external-force columns.
+        :param force:
+        :return:
+        """
+        self.state.joints.ext_fx[self.idx] += force.x
+        self.state.joints.ext_fy[self.idx] += force.y
 
     def connect(self, rod):
         """
@@ -33,9 +247,12 @@ class Joint:
 
 
 class Rod:
+    __slots__ = ('j1', 'j2', 'state', 'idx')
+
     def __init__(self, j1: Joint, j2: Joint):
         """
         A rod connecting two joints.
+        A thin handle over a row of the state's rod arrays.
         :param j1:
         :param j2:
         """
@@ -43,33 +260,193 @@ class Rod:
         self.j2 = j2
         j1.connect(self)
         j2.connect(self)
-        self.length = get_distance(j1.pos, j2.pos)
+        self.state = j1.state
+        # Rest length is filled in by State.finalize in one vectorized pass
+        self.idx = self.state.rods.append(j1.idx, j2.idx, 0)
+
+    @property
+    def rest_length(self) -> float:
+        return self.state.rods.rest_len[self.idx]
 
 
 class State:
-    def __init__(self, frame: int):
+    __slots__ = ('frame', 'dtype', 'joints', 'rods', '_scratch')
+
+    def __init__(self, frame: int, dtype=np.float32):
         """
         State of a simulation.
+        Joints and rods are stored as structure-of-arrays columns; Joint and Rod
+        handles index into them. Columns default to float32, which halves the
+        bandwidth of the step kernel; pass float64 where the extra precision matters.
+        :param frame:
+        :param dtype:
         """
         self.frame = frame
-        self.joints: List[Joint] = []
-        self.rods: List[Rod] = []
+        self.dtype = np.dtype(dtype)
+        self.joints = JointArrays(dtype=self.dtype)
+        self.rods = RodArrays(dtype=self.dtype)
+        self._scratch = None
+
+    def _rod_scratch(self, n_rods: int):
+        """ Preallocated per-rod work buffers, resized only when the rod count changes """
+        if self._scratch is None or self._scratch[0].shape[0] != n_rods:
+            self._scratch = tuple(np.empty(n_rods, dtype=self.dtype) for _ in range(4))
+        return self._scratch
+
+    def finalize(self):
+        """
+        Compute every rod's rest length from the current joint positions in one
+        vectorized pass. Called by Simulation once the topology is complete.
+        :return:
+        """
+        joints, rods = self.joints, self.rods
+        n_rods = rods.size
+        j1 = rods.j1_idx[:n_rods]
+        j2 = rods.j2_idx[:n_rods]
+        np.hypot(joints.pos_x[j2] - joints.pos_x[j1],
+                 joints.pos_y[j2] - joints.pos_y[j1],
+                 out=rods.rest_len[:n_rods])
+
+    def compute_rod_forces(self, stiffness: float):
+        """
+        Accumulate the spring force of every rod into the joint force columns,
+        as a handful of ufuncs over the whole rod arrays.
+        :param stiffness:
+        :return:
+        """
+        joints, rods = self.joints, self.rods
+        n_joints = joints.size
+        n_rods = rods.size
+        j1 = rods.j1_idx[:n_rods]
+        j2 = rods.j2_idx[:n_rods]
+        dx, dy, inv_lengths, magnitudes = self._rod_scratch(n_rods)
+        np.subtract(joints.pos_x[j2], joints.pos_x[j1], out=dx)
+        np.subtract(joints.pos_y[j2], joints.pos_y[j1], out=dy)
+        # Squared length, then one reciprocal of the sqrt, instead of hypot plus a divide
+        np.multiply(dx, dx, out=inv_lengths)
+        np.multiply(dy, dy, out=magnitudes)
+        inv_lengths += magnitudes
+        np.sqrt(inv_lengths, out=inv_lengths)
+        np.reciprocal(inv_lengths, out=inv_lengths)
+        np.multiply(rods.rest_len[:n_rods], inv_lengths, out=magnitudes)
+        np.subtract(1, magnitudes, out=magnitudes)
+        magnitudes *= stiffness
+        dx *= magnitudes
+        dy *= magnitudes
+        # bincount is a much faster dense scatter than np.add.at's serial fancy-index writes
+        joints.fx[:n_joints] += np.bincount(j1, weights=dx, minlength=n_joints)
+        joints.fy[:n_joints] += np.bincount(j1, weights=dy, minlength=n_joints)
+        joints.fx[:n_joints] -= np.bincount(j2, weights=dx, minlength=n_joints)
+        joints.fy[:n_joints] -= np.bincount(j2, weights=dy, minlength=n_joints)
+
+    def add_joint(self, pos: Vector2, material: Material, radius: float, thickness: float) -> Joint:
+        """
+        Add a joint to the state.
+        :param pos:
+        :param material:
+        :param radius:
+        :param thickness:
+        :return:
+        """
+        return Joint(self, pos, material, radius, thickness)
+
+    def add_joints_bulk(self, pos_xy: np.ndarray, radius, thickness, material: Material) -> np.ndarray:
+        """
+        Add many joints at once, computing every mass in one vectorized
+        expression; radius and thickness may be scalars or per-joint arrays.
+        Returns the new joint indices rather than per-joint handles — the
+        scalar add_joint stays available as the convenient slow path.
+        :param pos_xy:
+        :param radius:
+        :param thickness:
+        :param material:
+        :return:
+        """
+        pos_xy = np.asarray(pos_xy, dtype=self.dtype)
+        masses = np.broadcast_to(
+            math.pi * np.asarray(radius, dtype=self.dtype)**2 * thickness * material.density,
+            pos_xy.shape[0]
+        )
+        return self.joints.extend(pos_xy[:, 0], pos_xy[:, 1], masses)
+
+    def add_rod(self, j1: Joint, j2: Joint) -> Rod:
+        """
+        Add a rod between two joints of the state.
+        :param j1:
+        :param j2:
+        :return:
+        """
+        return Rod(j1, j2)
 
     def __repr__(self):
         return f'State[{self.frame}]'
 
 
 class Simulation:
-    def __init__(self, initial_state: State, total_time: float, dt: float = 0.01):
+    def __init__(self, initial_state: State, total_time: float, dt: float = 0.01, stiffness: float = 1.0,
+                 backend: str = 'cpu'):
+        """
+        A truss simulation over an initial state.
+        With backend='gpu' the state columns and history live on the GPU as
+        CuPy arrays and the per-frame updates run through the same vectorized
+        path via NumPy's dispatch machinery.
+        :param initial_state:
+        :param total_time:
+        :param dt:
+        :param stiffness:
+        :param backend: 'cpu' or 'gpu'
+        """
+        if backend not in {'cpu', 'gpu'}:
+            raise ValueError("Invalid backend. Options are 'cpu' or 'gpu'")
+        if backend == 'gpu' and cupy is None:
+            raise ImportError('CuPy is required for the GPU backend')
+        self.backend = backend
         self.dt = dt
         self.total_time = total_time
+        self.stiffness = stiffness
         self.current_frame = 0
-        self.record = [State(i) for i in range(len(self))]
-        self.record[0] = initial_state
+        self.state = initial_state
+        self._n_frames = int(total_time/dt)
+        # Recorded frames live in one compact column store, float32 being plenty for playback
+        self.history = np.empty((self._n_frames, initial_state.joints.size, 4), dtype=np.float32)
+        self._rod_fx = np.empty(initial_state.rods.size, dtype=initial_state.dtype)
+        self._rod_fy = np.empty(initial_state.rods.size, dtype=initial_state.dtype)
+        initial_state.finalize()
+        # Verlet needs the forces at the initial positions before the first half-kick
+        initial_state.joints.fx[:initial_state.joints.size] = initial_state.joints.ext_fx[:initial_state.joints.size]
+        initial_state.joints.fy[:initial_state.joints.size] = initial_state.joints.ext_fy[:initial_state.joints.size]
+        initial_state.compute_rod_forces(stiffness)
+        if backend == 'gpu':
+            joints, rods = initial_state.joints, initial_state.rods
+            for name in ('pos_x', 'pos_y', 'vel_x', 'vel_y', 'mass', 'inv_mass',
+                         'fx', 'fy', 'ext_fx', 'ext_fy'):
+                setattr(joints, name, cupy.asarray(getattr(joints, name)))
+            for name in ('j1_idx', 'j2_idx', 'rest_len'):
+                setattr(rods, name, cupy.asarray(getattr(rods, name)))
+            initial_state._scratch = tuple(cupy.empty(rods.size, dtype=initial_state.dtype) for _ in range(4))
+            self.history = cupy.asarray(self.history)
+        if numba is not None and backend == 'cpu':
+            self._step_kernel = make_step_kernel(
+                initial_state.joints.size, initial_state.rods.size,
+                stiffness, dt, dtype=initial_state.dtype
+            )
+        else:
+            self._step_kernel = None
+        self._record_frame()
         self.simulating = True
 
+    def _record_frame(self):
+        """ Write the current joint positions and velocities into the history store """
+        joints = self.state.joints
+        n_joints = joints.size
+        frame = self.history[self.current_frame]
+        frame[:, 0] = joints.pos_x[:n_joints]
+        frame[:, 1] = joints.pos_y[:n_joints]
+        frame[:, 2] = joints.vel_x[:n_joints]
+        frame[:, 3] = joints.vel_y[:n_joints]
+
     def __len__(self) -> int:
-        return int(self.total_time/self.dt)
+        return self._n_frames
 
     def __iter__(self):
         if self.simulating:
@@ -77,21 +454,47 @@ class Simulation:
         else:
             return RecordedSimulation(self)
 
-    def __next__(self) -> Union[StopIteration, tuple[State, State]]:
+    def __next__(self) -> Union[StopIteration, tuple[np.ndarray, np.ndarray]]:
         if self.done:
             self.simulating = False
             raise StopIteration
         else:
             return self.step()
 
-    def step(self) -> tuple[State, State]:
+    def step(self) -> tuple[np.ndarray, np.ndarray]:
         """
-        Simulate the next frame.
+        Simulate the next frame, advancing the state arrays in place.
         :return:
         """
-        self.current_frame += 1
-        # Actually simulate what happens here
-        return self.current_state, self.previous_state
+        joints, rods = self.state.joints, self.state.rods
+        n_joints, n_rods = joints.size, rods.size
+        if self._step_kernel is not None:
+            self._step_kernel(
+                joints.pos_x[:n_joints], joints.pos_y[:n_joints],
+                joints.vel_x[:n_joints], joints.vel_y[:n_joints],
+                joints.inv_mass[:n_joints],
+                joints.fx[:n_joints], joints.fy[:n_joints],
+                joints.ext_fx[:n_joints], joints.ext_fy[:n_joints],
+                rods.j1_idx[:n_rods], rods.j2_idx[:n_rods], rods.rest_len[:n_rods],
+                self._rod_fx, self._rod_fy
+            )
+        else:
+            half_dt = 0.5*self.dt
+            joints.vel_x[:n_joints] += half_dt*joints.fx[:n_joints]*joints.inv_mass[:n_joints]
+            joints.vel_y[:n_joints] += half_dt*joints.fy[:n_joints]*joints.inv_mass[:n_joints]
+            joints.pos_x[:n_joints] += self.dt*joints.vel_x[:n_joints]
+            joints.pos_y[:n_joints] += self.dt*joints.vel_y[:n_joints]
+            joints.fx[:n_joints] = joints.ext_fx[:n_joints]
+            joints.fy[:n_joints] = joints.ext_fy[:n_joints]
+            self.state.compute_rod_forces(self.stiffness)
+            joints.vel_x[:n_joints] += half_dt*joints.fx[:n_joints]*joints.inv_mass[:n_joints]
+            joints.vel_y[:n_joints] += half_dt*joints.fy[:n_joints]*joints.inv_mass[:n_joints]
+        # Direct indexing rather than the current_state/previous_state descriptors
+        frame = self.current_frame + 1
+        self.current_frame = frame
+        self._record_frame()
+        history = self.history
+        return history[frame], history[frame - 1]
 
     @property
     def current_time(self) -> float:
@@ -99,29 +502,28 @@ class Simulation:
 
     @property
     def done(self) -> bool:
-        return self.current_frame == len(self)-1
+        return self.current_frame == self._n_frames - 1
 
     @property
-    def current_state(self) -> State:
-        return self.record[self.current_frame]
+    def current_state(self) -> np.ndarray:
+        return self.history[self.current_frame]
 
     @property
-    def previous_state(self) -> State:
-        return self.record[self.current_frame - 1]
-
-    @current_state.setter
-    def current_state(self, value: State):
-        self.record[self.current_frame] = value
-
-    @previous_state.setter
-    def previous_state(self, value: State):
-        self.record[self.current_frame-1] = value
+    def previous_state(self) -> np.ndarray:
+        return self.history[self.current_frame - 1]
 
 
 class RecordedSimulation(Simulation):
     def __init__(self, simulation: Simulation):
-        super().__init__(simulation.record[0], simulation.total_time, dt=simulation.dt)
-        self.record = simulation.record
+        # Shares the finished simulation's history rather than re-running __init__,
+        # which would allocate a second history store
+        self.dt = simulation.dt
+        self.total_time = simulation.total_time
+        self.stiffness = simulation.stiffness
+        self._n_frames = simulation._n_frames
+        self.state = simulation.state
+        self.history = simulation.history
+        self._step_kernel = None
         self.current_frame = 0
         self.recording = False
 
@@ -139,7 +541,10 @@ class RecordedSimulation(Simulation):
         Step the record by one frame.
         :return:
         """
-        if self.done:
-            return None, self.current_state
-        self.current_frame += 1
-        return self.current_state, self.previous_state
+        history = self.history
+        frame = self.current_frame
+        if frame == self._n_frames - 1:
+            return None, history[frame]
+        frame += 1
+        self.current_frame = frame
+        return history[frame], history[frame - 1]